@@ -1,41 +1,80 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
+from typing import Dict, List, Literal, Optional
 import uuid
 import hashlib
+import hmac
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. Pool sizes are tuned for a single uvicorn worker;
+# zstd keeps the large product/cart payloads small on the wire.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=50,
+    minPoolSize=5,
+    serverSelectionTimeoutMS=2000,
+    retryWrites=True,
+    compressors="zstd",
+)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app
-app = FastAPI()
+# Create the main app (orjson serializes responses several times faster than
+# the stdlib json encoder, with native datetime/UUID handling)
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt_sha256", "bcrypt"],
+    argon2__memory_cost=65536,
+    argon2__time_cost=3,
+    argon2__parallelism=1,
+    bcrypt_sha256__rounds=12,
+    deprecated="auto",
+)
 security = HTTPBearer()
-SECRET_KEY = "your-secret-key-here-change-in-production"
+SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
+ALGORITHMS = (ALGORITHM,)
+# Prepare the HMAC key once; both encode and decode otherwise re-derive it
+# from the secret string on every call
+_JWT_KEY = jwt.algorithms.HMACAlgorithm(jwt.algorithms.HMACAlgorithm.SHA256).prepare_key(SECRET_KEY)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Short-TTL cache of verified tokens so repeat requests skip the JWT decode
+# and the users lookup. Keyed by SHA-256 of the bearer token; TTL stays well
+# below token lifetime so expired/revoked tokens age out quickly.
+AUTH_CACHE_TTL_SECONDS = 30
+_auth_cache = TTLCache(maxsize=10000, ttl=AUTH_CACHE_TTL_SECONDS)
+
 # Models
+# Documents use Mongo's own `_id` so lookups hit the built-in unique index
+# instead of a duplicate UUID field. The validation alias accepts `_id` when
+# loading from Mongo while responses still serialize the key as `id`;
+# `_to_mongo` renames it back on the way in.
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), validation_alias="_id")
     email: str
     username: str
     hashed_password: str
@@ -55,7 +94,9 @@ class Token(BaseModel):
     token_type: str
 
 class Product(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), validation_alias="_id")
     name: str
     description: str
     price: float
@@ -79,22 +120,87 @@ class CartItem(BaseModel):
     product_image: str
 
 class Cart(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), validation_alias="_id")
     user_id: str
-    items: List[CartItem] = []
+    # Indexed by product_id for O(1) membership/update in Python; stored and
+    # serialized as the original array so Mongo documents and JSON responses
+    # keep their shape
+    items: Dict[str, CartItem] = Field(default_factory=dict)
     total_price: float = 0.0
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @field_validator("items", mode="before")
+    @classmethod
+    def _index_items(cls, value):
+        if isinstance(value, list):
+            return {
+                item["product_id"] if isinstance(item, dict) else item.product_id: item
+                for item in value
+            }
+        return value
+
+    @field_serializer("items")
+    def _items_as_list(self, items: Dict[str, CartItem], _info):
+        return [item.model_dump() for item in items.values()]
+
 class AddToCartRequest(BaseModel):
     product_id: str
     quantity: int = 1
 
+class CartOp(BaseModel):
+    op: Literal["add", "set_qty", "remove", "clear"]
+    product_id: Optional[str] = None
+    quantity: int = 1
+
+class CartBulkRequest(BaseModel):
+    ops: List[CartOp]
+
 # Utility functions
+def _to_mongo(model: BaseModel) -> dict:
+    # Store under Mongo's `_id`; `id` is only a wire/JSON name
+    doc = model.model_dump()
+    doc["_id"] = doc.pop("id")
+    return doc
+
+def _prehash_password(password: str) -> str:
+    # Normalize input before the KDF: bcrypt-family schemes truncate at 72
+    # bytes and mishandle NUL bytes; a fixed-width sha256 hex digest avoids
+    # both and lets the work factor be raised without input-length cliffs
+    return hashlib.sha256(password.encode()).hexdigest()
+
 def verify_password(plain_password, hashed_password):
+    if pwd_context.verify(_prehash_password(plain_password), hashed_password):
+        return True
+    # Hashes created before pre-hashing was introduced were fed the raw password
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context.hash(_prehash_password(password))
+
+def _verify_and_migrate(password: str, hashed: str):
+    """Verify a password and return (verified, new_hash) where new_hash is a
+    replacement digest when the stored one uses a stale scheme or pre-dates
+    sha256 pre-hashing."""
+    verified, new_hash = pwd_context.verify_and_update(_prehash_password(password), hashed)
+    if not verified and pwd_context.verify(password, hashed):
+        verified, new_hash = True, get_password_hash(password)
+    return verified, new_hash
+
+# The KDFs burn 100ms+ of pure CPU per call; run them in a dedicated thread
+# pool so they don't stall every other coroutine on the event loop
+_hash_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pwd-hash")
+
+async def ahash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_pool, get_password_hash, password
+    )
+
+async def averify_and_migrate(password: str, hashed: str):
+    return await asyncio.get_running_loop().run_in_executor(
+        _hash_pool, _verify_and_migrate, password, hashed
+    )
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -103,27 +209,62 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def invalidate_token(token: str):
+    """Drop a token from the auth cache (e.g. on logout)."""
+    _auth_cache.pop(_token_cache_key(token), None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cache_key = _token_cache_key(credentials.credentials)
+    cached = _auth_cache.get(cache_key)
+    if cached is not None:
+        user, exp, token = cached
+        # Constant-time token comparison: don't trust the digest-keyed entry
+        # (or leak timing) on the off chance of a colliding key
+        if hmac.compare_digest(token.encode(), credentials.credentials.encode()):
+            if datetime.utcnow() < exp:
+                return user
+            _auth_cache.pop(cache_key, None)
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(credentials.credentials, _JWT_KEY, algorithms=ALGORITHMS)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.InvalidTokenError:
         raise credentials_exception
-    
+
     user = await db.users.find_one({"email": email})
     if user is None:
         raise credentials_exception
-    return User(**user)
+    user = User(**user)
+    exp = datetime.utcfromtimestamp(payload["exp"])
+    if exp > datetime.utcnow():
+        _auth_cache[cache_key] = (user, exp, credentials.credentials)
+    return user
+
+@app.on_event("startup")
+async def warm_up_password_hashing():
+    # Load the argon2/bcrypt C backends now so the first /login or /register
+    # doesn't pay their one-time initialization cost
+    pwd_context.hash("warmup")
+
+@app.on_event("startup")
+async def create_indexes():
+    # Keep the per-route lookups on index seeks instead of collection scans,
+    # and let Mongo enforce email/cart uniqueness instead of check-then-insert
+    await db.users.create_index("email", unique=True)
+    await db.products.create_index("category")
+    await db.carts.create_index("user_id", unique=True)
 
 # Routes
 @api_router.get("/")
@@ -133,32 +274,49 @@ async def root():
 # Authentication routes
 @api_router.post("/register", response_model=dict)
 async def register_user(user: UserCreate):
-    # Check if user already exists
-    existing_user = await db.users.find_one({"email": user.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await ahash_password(user.password)
     new_user = User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
-    
-    await db.users.insert_one(new_user.dict())
+
+    # The unique index on email makes check-then-insert unnecessary (and racy)
+    try:
+        await db.users.insert_one(_to_mongo(new_user))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User created successfully"}
 
 @api_router.post("/login", response_model=Token)
 async def login_user(user_credentials: UserLogin):
-    user = await db.users.find_one({"email": user_credentials.email})
-    if not user or not verify_password(user_credentials.password, user["hashed_password"]):
+    user = await db.users.find_one(
+        {"email": user_credentials.email},
+        {"email": 1, "hashed_password": 1}
+    )
+
+    # Verify against the pre-hashed form first; fall back to the raw password
+    # for hashes created before pre-hashing. Either way, stale hashes
+    # (deprecated scheme or raw-input era) are migrated after a success.
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await averify_and_migrate(
+            user_credentials.password, user["hashed_password"]
+        )
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    if new_hash:
+        await db.users.update_one(
+            {"email": user["email"]},
+            {"$set": {"hashed_password": new_hash}}
+        )
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user["email"]}, expires_delta=access_token_expires
@@ -174,140 +332,340 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     }
 
 # Product routes
-@api_router.get("/products", response_model=List[Product])
-async def get_products():
-    products = await db.products.find().to_list(1000)
-    return [Product(**product) for product in products]
+_PRODUCT_FIELDS = {"name", "description", "price", "category", "image_url", "in_stock", "created_at"}
+
+def _product_projection(fields: Optional[str]) -> Optional[dict]:
+    """Translate a comma-separated ?fields= list into a Mongo projection so
+    list views (e.g. the storefront grid) only fetch the columns they show."""
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",")}
+    invalid = requested - _PRODUCT_FIELDS
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(invalid))}")
+    return {field: 1 for field in requested}
+
+def _projected_product(doc: dict) -> dict:
+    return {"id": doc.pop("_id"), **doc}
+
+@api_router.get("/products")
+async def get_products(fields: Optional[str] = None):
+    # Stream the cursor instead of materializing a capped to_list(1000):
+    # one decode+construct pass per document and no silent truncation
+    projection = _product_projection(fields)
+    cursor = db.products.find({}, projection).batch_size(200)
+    if projection:
+        return [_projected_product(doc) async for doc in cursor]
+    return [Product(**doc) async for doc in cursor]
 
 @api_router.get("/products/category/{category}")
-async def get_products_by_category(category: str):
-    products = await db.products.find({"category": category}).to_list(1000)
-    return [Product(**product) for product in products]
-
-@api_router.get("/products/{product_id}", response_model=Product)
+async def get_products_by_category(category: str, fields: Optional[str] = None):
+    projection = _product_projection(fields)
+    cursor = db.products.find({"category": category}, projection).batch_size(200)
+    if projection:
+        return [_projected_product(doc) async for doc in cursor]
+    return [Product(**doc) async for doc in cursor]
+
+@api_router.get("/products/{product_id}")
 async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id})
+    product = await db.products.find_one({"_id": product_id})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return Product(**product)
 
 # Cart routes
+def _cart_update_pipeline(items_expr: dict, total_expr) -> list:
+    """Build an aggregation-pipeline update that rewrites the items array and
+    adjusts the running total server-side, so each mutation is one atomic op.
+    Both expressions see the pre-mutation document (single $set stage), which
+    keeps the total an O(1) delta instead of a re-sum over all items."""
+    return [
+        {"$set": {
+            "items": items_expr,
+            "total_price": total_expr,
+            "updated_at": datetime.utcnow()
+        }},
+    ]
+
+def _cart_item_expr(product_id: str) -> dict:
+    """Expression selecting the cart item matching product_id."""
+    return {"$arrayElemAt": [
+        {"$filter": {
+            "input": "$items",
+            "as": "item",
+            "cond": {"$eq": ["$$item.product_id", product_id]}
+        }},
+        0
+    ]}
+
+def _cart_total_plus(delta: float) -> dict:
+    return {"$add": [{"$ifNull": ["$total_price", 0]}, delta]}
+
+def _cart_total_without_item(product_id: str) -> dict:
+    return {"$let": {
+        "vars": {"removed": _cart_item_expr(product_id)},
+        "in": {"$subtract": [
+            "$total_price",
+            {"$multiply": ["$$removed.product_price", "$$removed.quantity"]}
+        ]}
+    }}
+
+def _cart_without_item(product_id: str) -> dict:
+    return {"$filter": {
+        "input": "$items",
+        "as": "item",
+        "cond": {"$ne": ["$$item.product_id", product_id]}
+    }}
+
+def _cart_with_item(cart_item: CartItem) -> dict:
+    """Expression that bumps the quantity if the item is already present and
+    appends it otherwise."""
+    return {"$cond": [
+        {"$in": [cart_item.product_id, "$items.product_id"]},
+        {"$map": {
+            "input": "$items",
+            "as": "item",
+            "in": {"$cond": [
+                {"$eq": ["$$item.product_id", cart_item.product_id]},
+                {"$mergeObjects": ["$$item", {"quantity": {"$add": ["$$item.quantity", cart_item.quantity]}}]},
+                "$$item"
+            ]}
+        }},
+        {"$concatArrays": ["$items", [cart_item.model_dump()]]}
+    ]}
+
+def _cart_total_recompute() -> dict:
+    """Full O(N) re-sum; only used where per-op deltas don't compose."""
+    return {"$sum": {"$map": {
+        "input": "$items",
+        "as": "item",
+        "in": {"$multiply": ["$$item.product_price", "$$item.quantity"]}
+    }}}
+
+def _cart_delta(updated: dict, product_id: str) -> dict:
+    """Minimal mutation response: just the touched item and the new total."""
+    new_qty = next(
+        (item["quantity"] for item in updated["items"] if item["product_id"] == product_id),
+        0
+    )
+    return {"product_id": product_id, "new_qty": new_qty, "total_price": updated["total_price"]}
+
+async def _cart_item_not_found(user_id: str):
+    """Distinguish the two 404s on the cold error path."""
+    if await db.carts.find_one({"user_id": user_id}, {"_id": 1}) is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    raise HTTPException(status_code=404, detail="Item not found in cart")
+
 @api_router.get("/cart")
 async def get_cart(current_user: User = Depends(get_current_user)):
     cart = await db.carts.find_one({"user_id": current_user.id})
     if not cart:
         # Create empty cart
         new_cart = Cart(user_id=current_user.id)
-        await db.carts.insert_one(new_cart.dict())
+        try:
+            await db.carts.insert_one(_to_mongo(new_cart))
+        except DuplicateKeyError:
+            # Lost the race with a concurrent first request; use its cart
+            cart = await db.carts.find_one({"user_id": current_user.id})
+            return Cart(**cart)
         return new_cart
     return Cart(**cart)
 
 @api_router.post("/cart/add")
-async def add_to_cart(request: AddToCartRequest, current_user: User = Depends(get_current_user)):
+async def add_to_cart(request: AddToCartRequest, minimal: bool = False, current_user: User = Depends(get_current_user)):
     # Get product details
-    product = await db.products.find_one({"id": request.product_id})
+    product = await db.products.find_one({"_id": request.product_id})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Get or create cart
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-    else:
-        cart = Cart(**cart)
-    
-    # Check if item already in cart
-    existing_item = None
-    for i, item in enumerate(cart.items):
-        if item.product_id == request.product_id:
-            existing_item = i
-            break
-    
-    if existing_item is not None:
-        # Update quantity
-        cart.items[existing_item].quantity += request.quantity
-    else:
-        # Add new item
-        cart_item = CartItem(
-            product_id=request.product_id,
-            quantity=request.quantity,
-            product_name=product["name"],
-            product_price=product["price"],
-            product_image=product["image_url"]
-        )
-        cart.items.append(cart_item)
-    
-    # Calculate total
-    cart.total_price = sum(item.product_price * item.quantity for item in cart.items)
-    cart.updated_at = datetime.utcnow()
-    
-    await db.carts.replace_one(
+    cart_item = CartItem(
+        product_id=request.product_id,
+        quantity=request.quantity,
+        product_name=product["name"],
+        product_price=product["price"],
+        product_image=product["image_url"]
+    )
+
+    # Bump the quantity if the item is already present, append it otherwise —
+    # one atomic round trip instead of find/mutate/replace
+    items_expr = _cart_with_item(cart_item)
+
+    pipeline = _cart_update_pipeline(
+        items_expr,
+        _cart_total_plus(product["price"] * request.quantity)
+    )
+    updated = await db.carts.find_one_and_update(
         {"user_id": current_user.id},
-        cart.dict(),
-        upsert=True
+        pipeline,
+        return_document=ReturnDocument.AFTER
     )
-    
+    cart = None
+    if updated is None:
+        cart = Cart(
+            user_id=current_user.id,
+            items=[cart_item],
+            total_price=cart_item.product_price * cart_item.quantity
+        )
+        try:
+            await db.carts.insert_one(_to_mongo(cart))
+        except DuplicateKeyError:
+            # Lost the race with a concurrent first add; retry as an update
+            updated = await db.carts.find_one_and_update(
+                {"user_id": current_user.id},
+                pipeline,
+                return_document=ReturnDocument.AFTER
+            )
+
+    if minimal:
+        if updated is not None:
+            return _cart_delta(updated, request.product_id)
+        return {
+            "product_id": request.product_id,
+            "new_qty": cart_item.quantity,
+            "total_price": cart.total_price
+        }
+
+    if updated is not None:
+        cart = Cart(**updated)
     return {"message": "Item added to cart", "cart": cart}
 
 @api_router.put("/cart/update/{product_id}")
-async def update_cart_item(product_id: str, quantity: int, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
-    
-    cart = Cart(**cart)
-    
-    # Find and update item
-    for i, item in enumerate(cart.items):
-        if item.product_id == product_id:
-            if quantity <= 0:
-                cart.items.pop(i)
-            else:
-                cart.items[i].quantity = quantity
-            break
+async def update_cart_item(product_id: str, quantity: int, minimal: bool = False, current_user: User = Depends(get_current_user)):
+    if quantity <= 0:
+        items_expr = _cart_without_item(product_id)
+        total_expr = _cart_total_without_item(product_id)
     else:
-        raise HTTPException(status_code=404, detail="Item not found in cart")
-    
-    # Recalculate total
-    cart.total_price = sum(item.product_price * item.quantity for item in cart.items)
-    cart.updated_at = datetime.utcnow()
-    
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict())
-    return {"message": "Cart updated", "cart": cart}
+        items_expr = {"$map": {
+            "input": "$items",
+            "as": "item",
+            "in": {"$cond": [
+                {"$eq": ["$$item.product_id", product_id]},
+                {"$mergeObjects": ["$$item", {"quantity": quantity}]},
+                "$$item"
+            ]}
+        }}
+        # Adjust the total by price * (new qty - old qty)
+        total_expr = {"$let": {
+            "vars": {"current": _cart_item_expr(product_id)},
+            "in": {"$add": [
+                "$total_price",
+                {"$multiply": [
+                    "$$current.product_price",
+                    {"$subtract": [quantity, "$$current.quantity"]}
+                ]}
+            ]}
+        }}
+
+    updated = await db.carts.find_one_and_update(
+        {"user_id": current_user.id, "items.product_id": product_id},
+        _cart_update_pipeline(items_expr, total_expr),
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        await _cart_item_not_found(current_user.id)
+
+    if minimal:
+        return _cart_delta(updated, product_id)
+    return {"message": "Cart updated", "cart": Cart(**updated)}
 
 @api_router.delete("/cart/remove/{product_id}")
-async def remove_from_cart(product_id: str, current_user: User = Depends(get_current_user)):
-    cart = await db.carts.find_one({"user_id": current_user.id})
-    if not cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
-    
-    cart = Cart(**cart)
-    
-    # Remove item
-    for i, item in enumerate(cart.items):
-        if item.product_id == product_id:
-            cart.items.pop(i)
-            break
-    else:
-        raise HTTPException(status_code=404, detail="Item not found in cart")
-    
-    # Recalculate total
-    cart.total_price = sum(item.product_price * item.quantity for item in cart.items)
-    cart.updated_at = datetime.utcnow()
-    
-    await db.carts.replace_one({"user_id": current_user.id}, cart.dict())
-    return {"message": "Item removed from cart", "cart": cart}
+async def remove_from_cart(product_id: str, minimal: bool = False, current_user: User = Depends(get_current_user)):
+    updated = await db.carts.find_one_and_update(
+        {"user_id": current_user.id, "items.product_id": product_id},
+        _cart_update_pipeline(
+            _cart_without_item(product_id),
+            _cart_total_without_item(product_id)
+        ),
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        await _cart_item_not_found(current_user.id)
+
+    if minimal:
+        return _cart_delta(updated, product_id)
+    return {"message": "Item removed from cart", "cart": Cart(**updated)}
 
 @api_router.delete("/cart/clear")
 async def clear_cart(current_user: User = Depends(get_current_user)):
     await db.carts.delete_one({"user_id": current_user.id})
     return {"message": "Cart cleared"}
 
+@api_router.post("/cart/bulk")
+async def bulk_update_cart(request: CartBulkRequest, current_user: User = Depends(get_current_user)):
+    """Apply a sequence of cart mutations in one round trip. Each op becomes
+    a pipeline stage, so the whole batch is still a single atomic update;
+    set_qty/remove on items not in the cart are no-ops."""
+    if not request.ops:
+        raise HTTPException(status_code=400, detail="No operations given")
+
+    # One query for every product referenced by an add op
+    add_ids = [op.product_id for op in request.ops if op.op == "add"]
+    products = {
+        doc["_id"]: doc
+        async for doc in db.products.find({"_id": {"$in": add_ids}})
+    } if add_ids else {}
+    missing = [pid for pid in add_ids if pid not in products]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Product not found: {', '.join(missing)}")
+
+    stages = []
+    for op in request.ops:
+        if op.op == "clear":
+            items_expr = []
+        elif op.product_id is None:
+            raise HTTPException(status_code=400, detail=f"product_id required for op '{op.op}'")
+        elif op.op == "add":
+            product = products[op.product_id]
+            items_expr = _cart_with_item(CartItem(
+                product_id=op.product_id,
+                quantity=op.quantity,
+                product_name=product["name"],
+                product_price=product["price"],
+                product_image=product["image_url"]
+            ))
+        elif op.op == "set_qty" and op.quantity > 0:
+            items_expr = {"$map": {
+                "input": "$items",
+                "as": "item",
+                "in": {"$cond": [
+                    {"$eq": ["$$item.product_id", op.product_id]},
+                    {"$mergeObjects": ["$$item", {"quantity": op.quantity}]},
+                    "$$item"
+                ]}
+            }}
+        else:  # remove, or set_qty <= 0
+            items_expr = _cart_without_item(op.product_id)
+        stages.append({"$set": {"items": items_expr}})
+    stages.append({"$set": {
+        "total_price": _cart_total_recompute(),
+        "updated_at": datetime.utcnow()
+    }})
+
+    updated = await db.carts.find_one_and_update(
+        {"user_id": current_user.id},
+        stages,
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        # No cart yet: create an empty one and re-apply the batch
+        try:
+            await db.carts.insert_one(_to_mongo(Cart(user_id=current_user.id)))
+        except DuplicateKeyError:
+            pass
+        updated = await db.carts.find_one_and_update(
+            {"user_id": current_user.id},
+            stages,
+            return_document=ReturnDocument.AFTER
+        )
+
+    return {"message": "Cart updated", "cart": Cart(**updated)}
+
 # Initialize sample data
 @api_router.post("/init-data")
 async def init_sample_data():
-    # Check if products already exist
-    existing_products = await db.products.count_documents({})
+    # Metadata-based count: O(1) versus count_documents' collection walk,
+    # and exactness doesn't matter for this already-seeded check
+    existing_products = await db.products.estimated_document_count()
     if existing_products > 0:
         return {"message": "Sample data already exists"}
     
@@ -356,21 +714,37 @@ async def init_sample_data():
         }
     ]
     
-    products = [Product(**product) for product in sample_products]
-    await db.products.insert_many([product.dict() for product in products])
-    
+    # Deterministic ids (uuid5 of the name) plus an unordered insert make
+    # seeding idempotent: re-runs hit duplicate keys instead of re-inserting
+    docs = [
+        _to_mongo(Product(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, product["name"])),
+            **product
+        ))
+        for product in sample_products
+    ]
+    try:
+        await db.products.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        if any(error.get("code") != 11000 for error in exc.details.get("writeErrors", [])):
+            raise
+
     return {"message": "Sample data initialized successfully"}
 
 # Include router
 app.include_router(api_router)
 
-# CORS middleware
+# CORS middleware. Wildcard origins with credentials is rejected by browsers
+# anyway; restrict to the storefront origin and cache preflights for a day so
+# non-simple requests don't pay an OPTIONS round trip each time.
+FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN", "http://localhost:3000")
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=[FRONTEND_ORIGIN],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
 # Configure logging
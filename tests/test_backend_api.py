@@ -0,0 +1,195 @@
+"""Pytest port of the backend API suite.
+
+Run with `pytest -n auto --dist=loadgroup` (pytest-xdist): the read-only
+product tests spread freely across workers, while the xdist_group marks
+keep the order-dependent auth and cart tests together on one worker in
+declaration order. State that backend_test.py threads through module
+globals lives in session-scoped fixtures here, built once per run.
+"""
+
+import os
+import uuid
+
+import pytest
+import requests
+
+
+def _backend_url():
+    url = os.environ.get('REACT_APP_BACKEND_URL')
+    if url:
+        return url
+    try:
+        with open('/app/frontend/.env') as f:
+            for line in f:
+                if line.startswith('REACT_APP_BACKEND_URL='):
+                    return line.split('=', 1)[1].strip()
+    except OSError:
+        pass
+    return None
+
+
+BACKEND_URL = _backend_url()
+API_BASE = f"{BACKEND_URL}/api" if BACKEND_URL else None
+
+pytestmark = pytest.mark.skipif(API_BASE is None, reason="backend URL not configured")
+
+# Unique per run so parallel/repeat runs never collide on registration
+_RUN_ID = uuid.uuid4().hex[:8]
+TEST_USER = {
+    "email": f"nguyen.van.{_RUN_ID}@gmail.com",
+    "username": f"nguyenvan{_RUN_ID}",
+    "password": "matkhau123",
+}
+
+
+@pytest.fixture(scope="session")
+def client():
+    session = requests.Session()
+    session.headers["Accept"] = "application/json"
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def seeded(client):
+    response = client.post(f"{API_BASE}/init-data", timeout=10)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture(scope="session")
+def auth_token(client):
+    response = client.post(f"{API_BASE}/register", json=TEST_USER, timeout=10)
+    assert response.status_code == 200
+    response = client.post(
+        f"{API_BASE}/login",
+        json={"email": TEST_USER["email"], "password": TEST_USER["password"]},
+        timeout=10,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    return data["access_token"]
+
+
+@pytest.fixture(scope="session")
+def auth_headers(auth_token):
+    return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture(scope="session")
+def products(client, seeded):
+    response = client.get(f"{API_BASE}/products", timeout=10)
+    assert response.status_code == 200
+    body = response.json()
+    assert body, "no products after seeding"
+    return body
+
+
+@pytest.fixture(scope="session")
+def sample_product_id(products):
+    return products[0]["id"]
+
+
+def test_root_endpoint(client):
+    response = client.get(f"{API_BASE}/", timeout=10)
+    assert response.status_code == 200
+    assert response.json()["message"] == "Pastry Shop API"
+
+
+def test_product_retrieval(products):
+    assert all("name" in product and "price" in product for product in products)
+
+
+def test_individual_product(client, sample_product_id):
+    response = client.get(f"{API_BASE}/products/{sample_product_id}", timeout=10)
+    assert response.status_code == 200
+    assert response.json()["id"] == sample_product_id
+
+
+def test_category_filtering(client, products):
+    categories = {product["category"] for product in products}
+    for category in categories:
+        response = client.get(f"{API_BASE}/products/category/{category}", timeout=10)
+        assert response.status_code == 200
+        expected = [p for p in products if p["category"] == category]
+        assert len(response.json()) == len(expected)
+
+
+@pytest.mark.xdist_group("auth")
+def test_duplicate_registration_rejected(client, auth_token):
+    response = client.post(f"{API_BASE}/register", json=TEST_USER, timeout=10)
+    assert response.status_code == 400
+    assert "already registered" in response.json()["detail"].lower()
+
+
+@pytest.mark.xdist_group("auth")
+def test_invalid_login_rejected(client, auth_token):
+    response = client.post(
+        f"{API_BASE}/login",
+        json={"email": TEST_USER["email"], "password": "wrong_password"},
+        timeout=10,
+    )
+    assert response.status_code == 401
+    assert "incorrect" in response.json()["detail"].lower()
+
+
+@pytest.mark.xdist_group("auth")
+def test_authenticated_user_info(client, auth_headers):
+    response = client.get(f"{API_BASE}/me", headers=auth_headers, timeout=10)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["email"] == TEST_USER["email"]
+    assert body["username"] == TEST_USER["username"]
+
+
+@pytest.mark.xdist_group("cart")
+def test_cart_add(client, auth_headers, sample_product_id):
+    response = client.post(
+        f"{API_BASE}/cart/add",
+        json={"product_id": sample_product_id, "quantity": 2},
+        headers=auth_headers,
+        timeout=10,
+    )
+    assert response.status_code == 200
+    cart = response.json()["cart"]
+    assert len(cart["items"]) == 1
+    assert cart["items"][0]["quantity"] == 2
+
+
+@pytest.mark.xdist_group("cart")
+def test_cart_update(client, auth_headers, sample_product_id):
+    response = client.put(
+        f"{API_BASE}/cart/update/{sample_product_id}?quantity=5",
+        headers=auth_headers,
+        timeout=10,
+    )
+    assert response.status_code == 200
+    cart = response.json()["cart"]
+    assert cart["items"][0]["quantity"] == 5
+
+
+@pytest.mark.xdist_group("cart")
+def test_cart_remove(client, auth_headers, sample_product_id):
+    response = client.delete(
+        f"{API_BASE}/cart/remove/{sample_product_id}",
+        headers=auth_headers,
+        timeout=10,
+    )
+    assert response.status_code == 200
+    assert response.json()["cart"]["items"] == []
+
+
+@pytest.mark.xdist_group("cart")
+def test_cart_clear(client, auth_headers, sample_product_id):
+    client.post(
+        f"{API_BASE}/cart/add",
+        json={"product_id": sample_product_id, "quantity": 1},
+        headers=auth_headers,
+        timeout=10,
+    )
+    response = client.delete(f"{API_BASE}/cart/clear", headers=auth_headers, timeout=10)
+    assert response.status_code == 200
+    response = client.get(f"{API_BASE}/cart", headers=auth_headers, timeout=10)
+    assert response.status_code == 200
+    assert response.json()["items"] == []